@@ -4,12 +4,37 @@
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from ftplib import FTP, error_perm
+from ftplib import FTP, all_errors, error_perm, error_proto, error_reply, error_temp, parse257
 import threading
+import concurrent.futures
+import math
+import re
+import queue
+import bisect
+import time
+from collections import OrderedDict
+import ssl
+import mmap
+import select
+import socket
+from contextlib import contextmanager
 import platform
 import string
+import ctypes
 from abc import ABC, abstractmethod
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_IS_WINDOWS = platform.system() == "Windows"
+_HAS_SENDFILE = hasattr(os, "sendfile")
+_HAS_SPLICE = hasattr(os, "splice")  # Linux only
+# Unix-style LIST line: type+permissions, links, owner, group, size, 3 date
+# fields, then the name (spaces included).
+_LIST_RE = re.compile(r'(?P<type>\S)\S*\s+\S+\s+\S+\s+\S+\s+(?P<size>\S+)\s+\S+\s+\S+\s+\S+\s+(?P<name>.+)')
+
 # --- Interfaces (Abstract Base Classes) for Dependency Inversion ---
 
 class FTPServiceInterface(ABC):
@@ -26,11 +51,11 @@ class FTPServiceInterface(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, local_path, remote_name):
+    def upload_file(self, local_path, remote_name, progress=None):
         pass
 
     @abstractmethod
-    def download_file(self, remote_name, local_path):
+    def download_file(self, remote_name, local_path, progress=None):
         pass
 
     @property
@@ -55,90 +80,813 @@ class FileServiceInterface(ABC):
     def get_parent_dir(self, path):
         pass
 
+    @abstractmethod
+    def is_root(self, path):
+        pass
+
 # --- Service Implementations ---
 
-class FTPService(FTPServiceInterface):
-    """Handles all FTP communication logic."""
+class BufferPool:
+    """Hands out reusable transfer buffers so no chunk is allocated per read."""
     def __init__(self):
-        self.ftp = None
+        self._free = queue.LifoQueue()
+
+    @contextmanager
+    def borrow(self, size):
+        try:
+            buf = self._free.get_nowait()
+        except queue.Empty:
+            buf = bytearray(size)
+        if len(buf) != size:
+            buf = bytearray(size)
+        try:
+            yield memoryview(buf)
+        finally:
+            self._free.put(buf)
+
+_transfer_buffers = BufferPool()
+
+class _TunedFTP(FTP):
+    """FTP session whose data connections get the socket buffer size asked for."""
+    tcp_buffer_size = None  # Bytes for SO_SNDBUF/SO_RCVBUF; None leaves the OS defaults
+
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = super().ntransfercmd(cmd, rest)
+        if self.tcp_buffer_size:
+            for option in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+                try:
+                    conn.setsockopt(socket.SOL_SOCKET, option, self.tcp_buffer_size)
+                except OSError:
+                    pass  # Keep whatever the OS allows
+        return conn, size
+
+class FTPConnectionPool:
+    """
+    Up to ``max_size`` logged-in FTP sessions, each lent to one caller at a
+    time. ``factory`` opens a new one only when every open session is busy.
+    """
+    def __init__(self, factory, max_size=4):
+        self._factory = factory
+        self.max_size = max_size
+        self._idle = []  # Most recently used last
+        self._opened = 0
+        self._closed = False
+        # Signalled whenever a session is released or a slot is freed.
+        self._available = threading.Condition()
+
+    def add(self, ftp):
+        """Puts an already opened session in the pool."""
+        with self._available:
+            self._opened += 1
+        self.release(ftp)
+
+    def acquire(self, block=True):
+        """
+        Lends an idle session, opening a new one while below max_size and
+        waiting for one to be released otherwise (or returning None, if
+        ``block`` is false).
+        """
+        with self._available:
+            while True:
+                if self._closed:
+                    raise ConnectionError("No hay conexión con el servidor")
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.max_size:
+                    self._opened += 1
+                    break
+                if not block:
+                    return None
+                self._available.wait()
+        try:
+            return self._factory()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def release(self, ftp):
+        with self._available:
+            if not self._closed:
+                self._idle.append(ftp)
+                self._available.notify()
+                return
+        ftp.close()  # Pool closed while the session was in use
+
+    def discard(self, ftp):
+        """Closes a session that can't be trusted anymore and frees its slot."""
+        ftp.close()
+        self._free_slot()
+
+    def _free_slot(self):
+        with self._available:
+            self._opened -= 1
+            self._available.notify()  # A waiter can open a new session now
+
+    def spare(self):
+        """How many sessions could be lent right now without waiting."""
+        with self._available:
+            return len(self._idle) + self.max_size - self._opened
+
+    def take_idle(self):
+        """Removes and returns all the sessions nobody is using right now."""
+        with self._available:
+            idle, self._idle = self._idle, []
+        return idle
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            self._available.notify_all()
+        # Sessions still in use are closed by release when they come back.
+        for ftp in self.take_idle():
+            try:
+                ftp.quit()
+            except Exception:
+                ftp.close()
+
+class FTPService(FTPServiceInterface):
+    """
+    Handles all FTP communication logic. Every operation borrows its own
+    logged-in session from a small pool, so a listing and a transfer running
+    at the same time never interleave commands on one control connection.
+    """
+    BLOCKSIZE = 1 << 20  # Bytes moved per socket/file call; 256 KiB - 1 MiB works best
+    # Upload paths where sendfile can't be used (TLS, no os.sendfile): files
+    # between the MMAP sizes are sent from a memory map, bigger ones overlap
+    # disk reads and sends, and smaller ones are read and sent block by block.
+    MMAP_MIN_SIZE = 4 << 20
+    MMAP_MAX_SIZE = 1 << 30
+    # Downloads above this size are split across several sessions
+    PARALLEL_THRESHOLD = 8 << 20
+    PARALLEL_STREAMS = 4
+    KEEPALIVE_INTERVAL = 30  # Seconds between NOOPs on idle sessions
+
+    def __init__(self, blocksize=None, max_connections=4, pipelining=True, tcp_buffer_size=None):
+        self.blocksize = blocksize or self.BLOCKSIZE
+        self.max_connections = max_connections
+        self._pipelining = pipelining
+        self.pipelining = pipelining  # Send CWD and PWD together when listing
+        # Fixed data socket buffers, e.g. 2x the bandwidth-delay product of a
+        # long fat link. Off by default: on Linux a fixed size disables the
+        # kernel's own buffer autotuning and is capped by net.core.*mem_max.
+        self.tcp_buffer_size = tcp_buffer_size
+        self._credentials = None
+        self._pool = None  # FTPConnectionPool; None while disconnected
+        self._use_mlsd = True
+        self._keepalive = None  # Timer for the next NOOP round
 
     def connect(self, host, user, password, timeout=10):
-        self.ftp = FTP(host, timeout=timeout)
-        welcome_message = self.ftp.login(user, password)
+        self._credentials = (host, user, password, timeout)
+        self._use_mlsd = True
+        self.pipelining = self._pipelining  # Could be another server
+        ftp = self._new_ftp(host, timeout)
+        welcome_message = ftp.login(user, password)
+        self._prepare_session(ftp)
+        self._pool = FTPConnectionPool(self._open_session, self.max_connections)
+        self._pool.add(ftp)
+        self._schedule_keepalive(self._pool)
         return welcome_message
 
+    def _open_connection(self):
+        """Opens an extra logged-in session using the credentials of the current one."""
+        host, user, password, timeout = self._credentials
+        ftp = self._new_ftp(host, timeout)
+        ftp.login(user, password)
+        return ftp
+
+    def _new_ftp(self, host, timeout):
+        ftp = _TunedFTP(host, timeout=timeout)
+        ftp.tcp_buffer_size = self.tcp_buffer_size
+        self._set_keepalive(ftp.sock)
+        return ftp
+
+    def _open_session(self):
+        ftp = self._open_connection()
+        self._prepare_session(ftp)
+        return ftp
+
+    @staticmethod
+    def _set_keepalive(sock):
+        # Lets the OS notice a dead peer, and keeps NAT/firewall entries alive.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 15), ('TCP_KEEPCNT', 4)):
+            if hasattr(socket, option):
+                try:
+                    sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+                except OSError:
+                    pass  # Known constant the running OS doesn't accept
+
+    def _schedule_keepalive(self, pool):
+        timer = threading.Timer(self.KEEPALIVE_INTERVAL, self._ping_idle, args=(pool,))
+        timer.daemon = True
+        self._keepalive = timer
+        timer.start()
+
+    def _ping_idle(self, pool):
+        """
+        Sends NOOP on the idle sessions so the server doesn't time them out
+        during a pause, and drops the ones that are already gone. Sessions in
+        use are busy anyway.
+        """
+        if pool is not self._pool:
+            return  # Disconnected or reconnected since this was scheduled
+        for ftp in pool.take_idle():
+            try:
+                ftp.voidcmd('NOOP')
+            except Exception:
+                pool.discard(ftp)
+            else:
+                pool.release(ftp)
+        if pool is self._pool:
+            self._schedule_keepalive(pool)
+
+    def _prepare_session(self, ftp):
+        # Ask for only the MLSD facts we show, once per session rather than
+        # once per listing; keeps every listing line short.
+        if self._use_mlsd:
+            try:
+                ftp.sendcmd('OPTS MLST type;size;')
+            except (error_perm, error_reply):
+                pass  # Not supported; MLSD (if any) sends its default facts
+
+    def _current_pool(self):
+        pool = self._pool
+        if pool is None:
+            raise ConnectionError("No hay conexión con el servidor")  # Like a closed pool
+        return pool
+
+    @contextmanager
+    def _acquire(self):
+        """Lends a pooled session for one operation."""
+        pool = self._current_pool()
+        with self._using(pool, pool.acquire()) as ftp:
+            yield ftp
+
+    @contextmanager
+    def _using(self, pool, ftp):
+        """Gives ``ftp`` back to ``pool`` afterwards, or drops it if it may be out of sync."""
+        try:
+            yield ftp
+        except (error_perm, error_temp) as e:
+            if str(e)[:3] == '421':
+                pool.discard(ftp)  # The server is closing the control connection
+            else:
+                pool.release(ftp)  # A normal error reply, the session is still fine
+            raise
+        except BaseException:
+            pool.discard(ftp)  # Anything else may have left the session out of sync
+            raise
+        else:
+            pool.release(ftp)
+
     def disconnect(self):
-        if self.ftp:
-            self.ftp.quit()
-            self.ftp = None
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+        pool.close()
 
     def list_directory(self, path):
-        self.ftp.cwd(path)
-        current_path = self.ftp.pwd()
-        lines = []
-        self.ftp.dir(lines.append)
-        
-        items = []
-        for line in sorted(lines, key=str.lower):
-            parts = line.split()
-            if len(parts) < 9: continue
+        """
+        Returns the absolute remote path and an iterator over its entries.
+        Entries are produced while the listing is still arriving, in server
+        order, and the pooled session stays busy until the iterator is
+        exhausted or closed.
+        """
+        pipelined = self.pipelining
+        entries = self._iter_directory(path)
+        try:
+            current_path = next(entries)  # CWD/PWD errors are raised right here
+        except all_errors:
+            if not pipelined or self.pipelining:
+                raise
+            # The server choked on pipelining, which is now off; try once more.
+            entries = self._iter_directory(path)
+            current_path = next(entries)
+        return current_path, entries
+
+    def _iter_directory(self, path):
+        with self._acquire() as ftp:
+            if self.pipelining:
+                _, reply = self._pipeline(ftp, [f'CWD {path}', 'PWD'])
+                yield parse257(reply)
+            else:
+                ftp.cwd(path)
+                yield ftp.pwd()
+
+            if self._use_mlsd:
+                entries = self._iter_mlsd(ftp)
+                try:
+                    first = next(entries, None)
+                except error_perm as e:
+                    if str(e)[:3] not in ('500', '502'):
+                        raise  # e.g. 550 on this one folder; MLSD itself works
+                    self._use_mlsd = False  # Server has no MLSD, stop asking for it
+                else:
+                    if first is not None:
+                        yield first
+                    yield from entries
+                    return
+            yield from self._iter_dir(ftp)
+
+    def _pipeline(self, ftp, cmds):
+        """
+        Sends ``cmds`` back to back and then reads their replies in order:
+        one round trip instead of one per command. Every reply is read even
+        after an error reply, so the session stays in step, and the first
+        error is raised at the end.
+        """
+        for cmd in cmds:
+            ftp.putcmd(cmd)
+        replies = []
+        error = None
+        for i in range(len(cmds)):
+            try:
+                replies.append(ftp.getresp())
+            except (error_perm, error_temp) as e:
+                replies.append(None)
+                error = error or e
+            except TimeoutError:
+                if i:
+                    # The first reply came but a later one never does: some
+                    # servers drop commands sent ahead. Go one by one from now on.
+                    self.pipelining = False
+                raise
+        if error:
+            raise error
+        return replies
+
+    @staticmethod
+    def _iter_lines(ftp, cmd):
+        """Like ftp.retrlines, but each line is yielded as soon as it arrives."""
+        ftp.voidcmd('TYPE A')
+        with ftp.transfercmd(cmd) as conn, conn.makefile('r', encoding=ftp.encoding) as fp:
+            for line in fp:
+                yield line.rstrip('\r\n')
+        ftp.voidresp()
+
+    def _iter_mlsd(self, ftp):
+        # MLSD facts are machine readable, no need to guess the LIST format.
+        # ftp.mlsd() would buffer the whole listing first, so parse it here.
+        for line in self._iter_lines(ftp, 'MLSD'):
+            facts_found, _, name = line.partition(' ')
+            facts = {}
+            for fact in facts_found[:-1].split(';'):
+                key, _, value = fact.partition('=')
+                facts[key.lower()] = value
+
+            entry_type = facts.get('type', '').lower()
+            if entry_type in ('cdir', 'pdir'): continue # "." and ".."
+
+            is_dir = entry_type == 'dir'
+            item_type = "Directorio" if is_dir else "Archivo"
+            size = facts.get('size', '') if not is_dir else ""
+            yield {'name': name, 'type': item_type, 'size': size, 'is_dir': is_dir}
+
+    def _iter_dir(self, ftp):
+        match = _LIST_RE.match
+        for line in self._iter_lines(ftp, 'LIST'):
+            m = match(line)
+            if m is None: continue
             
-            name = " ".join(parts[8:])
-            is_dir = line.startswith('d')
+            name = m['name']
+            is_dir = m['type'] == 'd'
             item_type = "Directorio" if is_dir else "Archivo"
-            size = parts[4] if not is_dir else ""
-            items.append({'name': name, 'type': item_type, 'size': size, 'is_dir': is_dir})
-        return current_path, items
+            size = m['size'] if not is_dir else ""
+            yield {'name': name, 'type': item_type, 'size': size, 'is_dir': is_dir}
+
+    def upload_file(self, local_path, remote_name, progress=None):
+        """
+        Sends straight to the data socket instead of going through
+        storbinary's per-block Python loop. ``progress(sent, total)`` is
+        called from this thread after every block.
+        """
+        report = progress or self._no_progress
+        with self._acquire() as ftp:
+            ftp.voidcmd('TYPE I')
+            with open(local_path, 'rb', buffering=self.blocksize) as f:
+                size = os.fstat(f.fileno()).st_size
+                with ftp.transfercmd(f'STOR {remote_name}') as conn:
+                    if _HAS_SENDFILE and not isinstance(conn, ssl.SSLSocket):
+                        self._send_file(conn, f, size, report)
+                    elif self.MMAP_MIN_SIZE <= size <= self.MMAP_MAX_SIZE:
+                        self._send_mapped(conn, f, size, report)
+                    elif size > self.MMAP_MAX_SIZE:
+                        self._send_pipelined(conn, f, size, report)
+                    else:
+                        self._send_buffered(conn, f, size, report)
+            return ftp.voidresp()
+
+    @staticmethod
+    def _no_progress(transferred, total):
+        pass
 
-    def upload_file(self, local_path, remote_name):
-        with open(local_path, 'rb') as f:
-            self.ftp.storbinary(f'STOR {remote_name}', f)
+    def _send_file(self, conn, f, size, report):
+        # Copied inside the kernel, never through our memory. Done a block at
+        # a time only so progress can be reported in between.
+        sent = 0
+        while sent < size:
+            n = conn.sendfile(f, sent, min(self.blocksize, size - sent))
+            if not n:
+                break
+            sent += n
+            report(sent, size)
+
+    def _send_mapped(self, conn, f, size, report):
+        # The OS pages the file in (with its own read-ahead) straight from the
+        # page cache; no copies into Python buffers.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            total = len(view)
+            for offset in range(0, total, self.blocksize):
+                end = min(offset + self.blocksize, total)
+                with view[offset:end] as chunk:
+                    conn.sendall(chunk)
+                report(end, size)
+
+    def _send_buffered(self, conn, f, size, report):
+        sent = 0
+        with _transfer_buffers.borrow(self.blocksize) as buf:
+            while n := f.readinto(buf):
+                conn.sendall(buf[:n])
+                sent += n
+                report(sent, size)
+
+    def _send_pipelined(self, conn, f, size, report):
+        """
+        Like _send_buffered, but the next block is read from disk on another
+        thread while the current one is being sent, taking turns on two
+        buffers, so disk and network time overlap.
+        """
+        free = queue.Queue()
+        filled = queue.Queue()
+
+        def read_ahead():
+            try:
+                while (buf := free.get()) is not None:
+                    n = f.readinto(buf)
+                    filled.put((buf, n))
+                    if not n:
+                        return
+            except BaseException as e:
+                filled.put((e, 0))
+
+        with _transfer_buffers.borrow(self.blocksize) as first, \
+                _transfer_buffers.borrow(self.blocksize) as second:
+            free.put(first)
+            free.put(second)
+            reader = threading.Thread(target=read_ahead, daemon=True)
+            reader.start()
+            sent = 0
+            try:
+                while True:
+                    buf, n = filled.get()
+                    if isinstance(buf, BaseException):
+                        raise buf
+                    if not n:
+                        break
+                    conn.sendall(buf[:n])
+                    free.put(buf)
+                    sent += n
+                    report(sent, size)
+            finally:
+                free.put(None)  # Stops the reader if we bailed out early
+                reader.join()
+
+    def download_file(self, remote_name, local_path, progress=None):
+        """
+        Same idea as upload_file: no retrbinary callback nor new bytes per
+        block. ``total`` is None for ``progress`` if the server has no SIZE.
+        Big files go through download_file_parallel when the server allows it.
+        """
+        report = progress or self._no_progress
+        with self._acquire() as ftp:
+            ftp.voidcmd('TYPE I')
+            size = self._remote_size(ftp, remote_name)
+            if not size or size <= self.PARALLEL_THRESHOLD:
+                return self._download_stream(ftp, remote_name, local_path, size, report)
+
+        try:
+            return self.download_file_parallel(remote_name, local_path, size,
+                                               streams=self.PARALLEL_STREAMS, progress=progress)
+        except (error_perm, error_temp):
+            pass  # No REST support: one stream then
+        with self._acquire() as ftp:
+            ftp.voidcmd('TYPE I')
+            return self._download_stream(ftp, remote_name, local_path, size, report)
+
+    def _download_stream(self, ftp, remote_name, local_path, size, report):
+        with open(local_path, 'wb', buffering=self.blocksize) as f:
+            try:
+                if size:
+                    self._preallocate(f, size)
+                with ftp.transfercmd(f'RETR {remote_name}') as conn:
+                    if _HAS_SPLICE and not isinstance(conn, ssl.SSLSocket):
+                        self._receive_spliced(conn, f, size, report)
+                    else:
+                        self._receive_buffered(conn, f, size, report)
+            finally:
+                if size:
+                    # Cut at what actually arrived: SIZE may have announced
+                    # more, and a failed download must not look complete.
+                    f.truncate()
+        return ftp.voidresp()
+
+    def _receive_buffered(self, conn, f, size, report):
+        # readinto on a buffered reader waits for a whole block, where
+        # recv_into returns whatever one TCP read had; disk writes stay large.
+        received = 0
+        with _transfer_buffers.borrow(self.blocksize) as buf, \
+                conn.makefile('rb', buffering=self.blocksize) as reader:
+            while n := reader.readinto(buf):
+                f.write(buf[:n])
+                received += n
+                report(received, size)
+
+    def _receive_spliced(self, conn, f, size, report):
+        """
+        Moves the data socket -> a pipe -> the file with splice(2), so the
+        bytes never leave the kernel. sendfile(2) can't do this direction:
+        its source must be a regular file.
+        """
+        read_fd, write_fd = os.pipe()
+        try:
+            if hasattr(fcntl, 'F_SETPIPE_SZ'):
+                try:
+                    fcntl.fcntl(write_fd, fcntl.F_SETPIPE_SZ, self.blocksize)
+                except OSError:
+                    pass  # Above the system limit; the default pipe size still works
+            sock_fd = conn.fileno()
+            file_fd = f.fileno()
+            timeout = conn.gettimeout()
+            received = 0
+            while True:
+                try:
+                    n = os.splice(sock_fd, write_fd, self.blocksize)
+                except BlockingIOError:
+                    # Sockets with a timeout are non-blocking underneath.
+                    if not select.select([conn], [], [], timeout)[0]:
+                        raise socket.timeout("timed out")
+                    continue
+                if not n:
+                    break
+                while n:
+                    moved = os.splice(read_fd, file_fd, n)
+                    n -= moved
+                    received += moved
+                report(received, size)
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    @staticmethod
+    def _remote_size(ftp, remote_name):
+        try:
+            return ftp.size(remote_name)
+        except (error_perm, error_reply):
+            return None  # Not every server implements SIZE
+
+    @staticmethod
+    def _preallocate(f, size):
+        """Reserves the whole file at once instead of letting it grow block by block."""
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except (AttributeError, OSError):
+            # No posix_fallocate (Windows) or unsupported by the filesystem.
+            f.truncate(size)
+
+    def download_file_parallel(self, remote_name, local_path, size, streams=4, progress=None):
+        """
+        Downloads a file over several pooled sessions at once. Each session
+        asks for its own byte range with REST and writes it at the matching
+        offset of the local file. Only the sessions the pool can spare right
+        now are used (up to ``streams``), so max_connections still holds, and
+        one is always left free so listings don't wait behind the download.
+        """
+        report = progress or self._no_progress
+        pool = self._current_pool()
+        sessions = [pool.acquire()]
+        while len(sessions) < streams and pool.spare() > 1:
+            try:
+                ftp = pool.acquire(block=False)
+            except all_errors:
+                break  # e.g. the server allows no more logins; go with what we have
+            if ftp is None:
+                break
+            sessions.append(ftp)
+
+        if len(sessions) == 1:
+            with self._using(pool, sessions[0]) as ftp:
+                ftp.voidcmd('TYPE I')
+                return self._download_stream(ftp, remote_name, local_path, size, report)
+
+        chunk = math.ceil(size / len(sessions))
+        ranges = [(offset, min(chunk, size - offset)) for offset in range(0, size, chunk)]
+        for ftp in sessions[len(ranges):]:
+            pool.release(ftp)
 
-    def download_file(self, remote_name, local_path):
         with open(local_path, 'wb') as f:
-            self.ftp.retrbinary(f'RETR {remote_name}', f.write)
+            self._preallocate(f, size)
+
+        received = 0
+        received_lock = threading.Lock()
+        def count(n):
+            nonlocal received
+            with received_lock:
+                received += n
+                total = received
+            report(total, size)  # Outside the lock; it may be slow to return
+
+        def fetch(ftp, offset, length):
+            reusable = False
+            try:
+                reusable = self._download_range(ftp, remote_name, local_path, offset, length, count,
+                                                offset + length == size)
+            except (error_perm, error_temp) as e:
+                reusable = str(e)[:3] != '421'  # A refused command leaves the session in step
+                raise
+            finally:
+                if reusable:
+                    pool.release(ftp)
+                else:
+                    pool.discard(ftp)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(ranges),
+                                                       thread_name_prefix='ftp-range') as executor:
+                futures = [executor.submit(fetch, ftp, offset, length)
+                           for ftp, (offset, length) in zip(sessions, ranges)]
+            for future in futures:
+                future.result()  # Re-raises the first failure
+        except BaseException:
+            # Ranges land out of order, so a failed download is full size with
+            # holes of zeros; don't leave it behind looking complete.
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+            raise
+
+    def _download_range(self, ftp, remote_name, local_path, offset, length, count, last):
+        """
+        Fetches ``length`` bytes from ``offset``. Returns whether the session
+        can be reused: only the last range ends with the file, the others
+        hang up while the server is still sending.
+        """
+        ftp.voidcmd('TYPE I')
+        with ftp.transfercmd(f'RETR {remote_name}', rest=offset) as conn, \
+                conn.makefile('rb', buffering=self.blocksize) as reader, \
+                open(local_path, 'r+b', buffering=self.blocksize) as f, \
+                _transfer_buffers.borrow(self.blocksize) as buf:
+            f.seek(offset)
+            remaining = length
+            while remaining:
+                n = reader.readinto(buf[:min(len(buf), remaining)])
+                if not n:
+                    raise EOFError(f"Conexión cerrada antes de tiempo al descargar {remote_name}")
+                f.write(buf[:n])
+                remaining -= n
+                count(n)
+        if not last:
+            return False
+        ftp.voidresp()
+        return True
 
     @property
     def is_connected(self):
-        return self.ftp is not None
+        return self._pool is not None
 
 class LocalFileService(FileServiceInterface):
     """Handles all local file system interactions."""
-    def list_directory(self, path):
-        if not os.path.exists(path) or not os.path.isdir(path):
-            raise FileNotFoundError(f"La ruta no existe o no es un directorio: {path}")
+    def __init__(self):
+        # Neither changes during a session, so look them up only once.
+        self._drives = None
+        self._home = None
+        # Paths with no parent to go up to; a set lookup per navigation.
+        self._roots = set(self.get_available_drives() or ['/'])
 
+    def list_directory(self, path):
         abs_path = os.path.abspath(path)
+        # scandir hands back the file type from the directory read itself, so
+        # only files need an extra stat (and none at all on Windows). It also
+        # fails by itself on bad paths, no need to stat the path beforehand.
+        try:
+            it = os.scandir(abs_path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise FileNotFoundError(f"La ruta no existe o no es un directorio: {path}") from None
+        with it:
+            entries = sorted(it, key=lambda e: e.name.casefold())
+
         items = []
-        for item_name in sorted(os.listdir(abs_path), key=str.lower):
-            full_path = os.path.join(abs_path, item_name)
+        for entry in entries:
             try:
-                is_dir = os.path.isdir(full_path)
+                is_dir = entry.is_dir()
                 item_type = "Directorio" if is_dir else "Archivo"
-                size = os.path.getsize(full_path) if not is_dir else ""
-                items.append({'name': item_name, 'type': item_type, 'size': size, 'is_dir': is_dir})
-            except (OSError, PermissionError):
+                size = entry.stat().st_size if not is_dir else ""
+                items.append({'name': entry.name, 'type': item_type, 'size': size, 'is_dir': is_dir})
+            except OSError:
                 continue # Ignore files that can't be accessed
         return abs_path, items
 
     def get_available_drives(self):
-        if platform.system() == "Windows":
-            return [f"{d}:\\" for d in string.ascii_uppercase if os.path.exists(f"{d}:")]
-        return []
+        if self._drives is None:
+            if _IS_WINDOWS:
+                # One bitmask (bit 0 = A:) instead of probing 26 paths
+                mask = ctypes.windll.kernel32.GetLogicalDrives()
+                self._drives = [f"{d}:\\" for bit, d in enumerate(string.ascii_uppercase) if mask >> bit & 1]
+            else:
+                self._drives = []
+        return list(self._drives)
 
     def get_user_home(self):
-        return os.path.expanduser("~")
+        if self._home is None:
+            self._home = os.path.expanduser("~")
+        return self._home
 
     def get_parent_dir(self, path):
         return os.path.dirname(path)
 
+    def is_root(self, path):
+        return path in self._roots
+
 # --- GUI Class ---
 
+class ListingCache:
+    """
+    Remembers the last few directory listings for a few seconds, so going
+    back and forth between folders doesn't list them again every time.
+    Least recently used listings are dropped first.
+    """
+    def __init__(self, max_entries=32, ttl=5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # requested path -> (timestamp, abs_path, items, version)
+        self._lock = threading.Lock()  # Remote listings are stored from worker threads
+
+    def get(self, path, version=None):
+        """
+        Returns ``(abs_path, items)``, or None if missing, expired or stored
+        with another ``version`` (e.g. the folder's mtime when listed).
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            stamp, abs_path, items, stored_version = entry
+            if time.monotonic() - stamp >= self.ttl or stored_version != version:
+                del self._entries[path]
+                return None
+            self._entries.move_to_end(path)
+            return abs_path, items
+
+    def put(self, path, abs_path, items, version=None):
+        with self._lock:
+            self._entries[path] = (time.monotonic(), abs_path, items, version)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, abs_path):
+        with self._lock:
+            for path in [path for path, entry in self._entries.items() if abs_path in (path, entry[1])]:
+                del self._entries[path]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class _TreeFill(queue.Queue):
+    """Batches of listing items on their way into a tree, ending with None."""
+    cancelled = False  # Set once nobody is going to insert them anymore
+    seen = None  # Names received so far, when refreshing the rows on screen
+    failed = False  # The listing broke off; what arrived is not the whole folder
+    limit = None  # Rows to show before waiting for the user to scroll down
+    paused = False
+    added = frozenset()  # Rows put on screen meanwhile by finished transfers
+
+    def has_rows(self):
+        """True if a batch of rows, not just the end marker, is waiting."""
+        with self.mutex:
+            return bool(self.queue) and self.queue[0] is not None
+
 class FTPClientGUI:
     """
     The main application GUI. It is responsible for the user interface and
     delegates all FTP and file system operations to the respective services.
     """
+    _DIR_PREFIX = "📁 "
+    _FILE_PREFIX = "📄 "
+    _FILL_BATCH = 200  # Rows inserted per Tk loop tick
+    _FILL_INTERVAL_MS = 16
+    _PROGRESS_INTERVAL_MS = 100  # How often the progress bar catches up with the transfers
+    # Huge folders show this many rows first, then a page more each time the
+    # view gets near the end, instead of building thousands of rows up front.
+    _FIRST_PAGE = 500
+    _PAGE = 200
+    # Transfers running at once; one below the FTP service's default pool of
+    # four sessions, so browsing the server never waits for them.
+    _MAX_TRANSFERS = 3
+
     def __init__(self, master: tk.Tk, ftp_service: FTPServiceInterface, file_service: FileServiceInterface):
         self.master = master
         self.ftp_service = ftp_service
@@ -146,6 +894,26 @@ class FTPClientGUI:
 
         self.current_local_path = self.file_service.get_user_home()
         self.current_remote_path = "/"
+        self._fills = {}  # (tree widget name, parent row) -> _TreeFill being inserted
+        self._sort_keys = {}  # (tree widget name, parent row) -> sorted casefolded names of its rows
+        self._rows = {}  # tree widget name -> {row id: listing item it shows}, ".." aside
+        self._expanding = set()  # (tree widget name, row) of folders being listed
+        self._shown = {}  # tree widget name -> folder whose listing is on screen
+        self._remote_request = None  # Latest remote listing asked for
+        self._local_mtime = None  # st_mtime_ns of the local folder when it was listed
+        self._local_cache = ListingCache()
+        self._remote_cache = ListingCache()
+        # One small pool for listings and connecting instead of a thread per
+        # click, and a separate one for transfers so a big multi-file
+        # selection doesn't hold up navigation. Transfers of a selection run
+        # side by side, each on its own pooled FTP session.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='ftp-io')
+        self._transfers = concurrent.futures.ThreadPoolExecutor(max_workers=self._MAX_TRANSFERS,
+                                                                thread_name_prefix='ftp-transfer')
+        self._progress = {}  # transfer key -> [bytes done, bytes total] of the current batch
+        self._progress_lock = threading.Lock()  # Updated from the transfer threads
+        self._progress_polling = False
+        self._closing = False  # Set once the window is going away
 
         self._setup_ui()
         self.populate_local_tree()
@@ -153,6 +921,7 @@ class FTPClientGUI:
     def _setup_ui(self):
         self.master.title("Cliente FTP Moderno (SOLID)")
         self.master.geometry("1200x750")
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # --- Style ---
         self.style = ttk.Style(self.master)
@@ -183,7 +952,7 @@ class FTPClientGUI:
         paned_window.pack(fill="both", expand=True, padx=10, pady=5)
 
         # --- Local Files Panel ---
-        local_frame, self.local_path_label, self.local_tree = self._create_file_panel(paned_window, "Local")
+        local_frame, self.local_path_label, self.local_tree = self._create_file_panel(paned_window, "Local", self.refresh_local_tree)
         self.setup_drive_selector(local_frame.winfo_children()[0]) # Pass the controls frame
         paned_window.add(local_frame, weight=1)
 
@@ -192,7 +961,7 @@ class FTPClientGUI:
         paned_window.add(transfer_frame, weight=0)
 
         # --- Remote Files Panel ---
-        remote_frame, self.remote_path_label, self.remote_tree = self._create_file_panel(paned_window, "Remoto")
+        remote_frame, self.remote_path_label, self.remote_tree = self._create_file_panel(paned_window, "Remoto", self.refresh_remote_tree)
         paned_window.add(remote_frame, weight=1)
 
         # --- Log Frame ---
@@ -208,11 +977,14 @@ class FTPClientGUI:
         entry.insert(0, default_value)
         return entry
 
-    def _create_file_panel(self, parent, title):
+    def _create_file_panel(self, parent, title, refresh_command):
         frame = ttk.Frame(parent, width=550)
         
         controls_frame = ttk.Frame(frame)
         controls_frame.pack(fill="x", pady=(0, 5))
+
+        refresh_button = ttk.Button(controls_frame, text="⟳", command=refresh_command, width=3)
+        refresh_button.pack(side="right", padx=5)
         
         path_label = ttk.Label(controls_frame, text=f"{title}: /", anchor="w", wraplength=400)
         path_label.pack(side="left", fill="x", expand=True, padx=5)
@@ -230,10 +1002,13 @@ class FTPClientGUI:
         
         download_button = ttk.Button(frame, text="◀", command=self.download_file, width=4)
         download_button.pack(pady=20, padx=5)
+
+        self.progress_bar = ttk.Progressbar(frame, orient="horizontal", length=60, mode="determinate", maximum=100)
+        self.progress_bar.pack(pady=20, padx=5)
         return frame
 
     def setup_drive_selector(self, parent_frame):
-        if platform.system() == "Windows":
+        if _IS_WINDOWS:
             ttk.Label(parent_frame, text="Unidad:").pack(side="left", padx=(0, 5))
             drives = self.file_service.get_available_drives()
             self.drive_var = tk.StringVar()
@@ -258,9 +1033,14 @@ class FTPClientGUI:
         tree.column("type", width=120, anchor="w")
         
         tree.bind("<Double-1>", lambda event: self.on_double_click(event, tree))
+        tree.bind("<<TreeviewOpen>>", lambda event: self.on_tree_open(tree))
 
         scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if float(last) > 0.9:
+                self._next_page(tree)
+        tree.configure(yscrollcommand=on_scroll)
         
         scrollbar.pack(side="right", fill="y")
         tree.pack(side="left", fill="both", expand=True)
@@ -268,11 +1048,21 @@ class FTPClientGUI:
         return tree
 
     def log(self, message):
+        if self._closing:
+            return  # Transfers still finishing; the window is gone
         self.log_text.config(state="normal")
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
         self.log_text.config(state="disabled")
 
+    def on_close(self):
+        # Queued jobs are dropped; a transfer already running is let finish
+        # (the process waits for it), without touching the window anymore.
+        self._closing = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._transfers.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
+
     def toggle_connection(self):
         if self.ftp_service.is_connected:
             self.disconnect_ftp()
@@ -297,12 +1087,13 @@ class FTPClientGUI:
                 self.master.after(0, lambda: messagebox.showerror("Error de Conexión", str(e)))
                 self.log(f"Error de conexión: {e}")
 
-        threading.Thread(target=do_connect, daemon=True).start()
+        self._executor.submit(do_connect)
 
     def update_ui_on_connect(self, welcome_msg):
         self.status_label.config(text="Estado: Conectado", foreground="green")
         self.connect_button.config(text="Desconectar", style="Green.TButton")
         self.log(f"Conexión exitosa: {welcome_msg}")
+        self._remote_cache.clear()  # Could be another server
         self.populate_remote_tree()
 
     def disconnect_ftp(self):
@@ -313,31 +1104,254 @@ class FTPClientGUI:
         finally:
             self.status_label.config(text="Estado: Desconectado", foreground="red")
             self.connect_button.config(text="Conectar", style="Red.TButton")
-            self.remote_tree.delete(*self.remote_tree.get_children())
+            self._clear_tree(self.remote_tree)
             self.log("Desconectado del servidor.")
 
-    def populate_local_tree(self, path=None):
+    def _insert_items(self, tree, items, parent=""):
+        # Tk already postpones redraws and scrollbar updates until the loop
+        # is idle, so the per-row cost left is ours: keep it to constant
+        # prefixes and one concatenation.
+        #
+        # Row ids are paths relative to the folder on screen ("sub/file.txt").
+        # Folders get a single placeholder child, listed when first opened.
+        #
+        # Remote listings arrive in server order, so each row is inserted at
+        # its sorted position, found by bisecting the names already shown.
+        dir_prefix, file_prefix = self._DIR_PREFIX, self._FILE_PREFIX
+        insert = tree.insert
+        prefix = f"{parent}/" if parent else ""
+        keys = self._sort_keys.setdefault((str(tree), parent), [])
+        rows = self._rows.setdefault(str(tree), {})
+        offset = 1 if not parent and tree.exists("..") else 0  # ".." stays on top
+        for item in items:
+            name = item['name']
+            iid = prefix + name
+            key = name.casefold()
+            position = bisect.bisect(keys, key)
+            keys.insert(position, key)
+            is_dir = item['is_dir']
+            text = (dir_prefix if is_dir else file_prefix) + name
+            insert(parent, position + offset, text=text, values=(item['size'], item['type']), iid=iid)
+            rows[iid] = item
+            if is_dir:
+                insert(iid, "end", text="Cargando...", iid=iid + "/")
+
+    def _sync_items(self, tree, items, seen):
+        """
+        Refreshes the top-level rows already on screen against ``items``:
+        changed rows are updated in place and only the new ones inserted.
+        Folders keep their expanded contents.
+        """
+        rows = self._rows.setdefault(str(tree), {})
+        new = []
+        for item in items:
+            name = item['name']
+            seen.add(name)
+            shown = rows.get(name)
+            if shown is None:
+                new.append(item)
+            elif shown['is_dir'] != item['is_dir']:
+                self._delete_row(tree, name)
+                new.append(item)
+            elif str(shown['size']) != str(item['size']):
+                tree.item(name, values=(item['size'], item['type']))
+                rows[name] = item
+        self._insert_items(tree, new)
+
+    def _prune_rows(self, tree, seen):
+        """Removes the top-level rows that a refreshed listing no longer has."""
+        rows = self._rows.get(str(tree), {})
+        for iid in [iid for iid in rows if "/" not in iid and iid not in seen]:
+            self._delete_row(tree, iid)
+
+    def _delete_row(self, tree, iid):
+        tree.delete(iid)
+        parent, _, name = iid.rpartition("/")
+        keys = self._sort_keys.get((str(tree), parent))
+        if keys:
+            key = name.casefold()
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+        rows = self._rows[str(tree)]
+        if not rows.pop(iid)['is_dir']:
+            return
+        # Forget everything that was listed inside the folder.
+        nested = iid + "/"
+        under = lambda key: key[0] == str(tree) and (key[1] == iid or key[1].startswith(nested))
+        for row in [row for row in rows if row.startswith(nested)]:
+            del rows[row]
+        for key in [key for key in self._fills if under(key)]:
+            self._fills.pop(key).cancelled = True
+        self._sort_keys = {key: names for key, names in self._sort_keys.items() if not under(key)}
+        self._expanding = {key for key in self._expanding if not under(key)}
+
+    def _begin_fill(self, tree, fill, parent=""):
+        """
+        Starts feeding ``tree`` (under ``parent``) from ``fill``, one batch
+        per Tk loop tick so big listings never freeze the window.
+        """
+        key = (str(tree), parent)
+        if key in self._fills:
+            self._fills[key].cancelled = True
+        self._fills[key] = fill
+        if not parent:
+            # A refresh only counts the rows it adds.
+            fill.limit = len(self._sort_keys.get(key, ())) + self._FIRST_PAGE
+        self.master.after(0, self._drain_fill, tree, fill, parent)
+        return fill
+
+    def _next_page(self, tree):
+        fill = self._fills.get((str(tree), ""))
+        if fill is not None and fill.paused:
+            fill.limit += self._PAGE
+            fill.paused = False
+            self.master.after(0, self._drain_fill, tree, fill, "")
+
+    def _queue_batches(self, fill, items):
+        """
+        Puts ``items`` on ``fill`` in batches. ``items`` may be a remote
+        listing still arriving, so this usually runs on a worker thread.
+        """
+        batch = []
+        try:
+            for item in items:
+                if fill.cancelled:
+                    return
+                batch.append(item)
+                if len(batch) == self._FILL_BATCH:
+                    fill.put(batch)
+                    batch = []
+        except BaseException:
+            fill.failed = True
+            raise
+        finally:
+            if batch and not fill.cancelled:
+                fill.put(batch)  # Whatever arrived before the end or the error
+            fill.put(None)
+
+    def _drain_fill(self, tree, fill, parent):
+        key = (str(tree), parent)
+        if self._fills.get(key) is not fill:
+            return  # Cancelled or replaced by a newer listing
+        if fill.limit is not None and len(self._sort_keys.get(key, ())) >= fill.limit and fill.has_rows():
+            fill.paused = True  # Resumed by _next_page
+            return
+        try:
+            batch = fill.get_nowait()
+        except queue.Empty:
+            batch = []
+        if batch is None:
+            del self._fills[key]
+            if fill.seen is not None and not fill.failed:
+                self._prune_rows(tree, fill.seen)  # Only a complete listing says what's gone
+            return
+        if fill.added:
+            # Already shown with its size after the transfer; the listing's may be older.
+            batch = [item for item in batch if item['name'] not in fill.added]
+        if fill.seen is not None:
+            self._sync_items(tree, batch, fill.seen)
+        else:
+            self._insert_items(tree, batch, parent)
+        self.master.after(self._FILL_INTERVAL_MS, self._drain_fill, tree, fill, parent)
+
+    def _clear_tree(self, tree):
+        for key in [key for key in self._fills if key[0] == str(tree)]:
+            self._fills.pop(key).cancelled = True
+        self._sort_keys = {key: names for key, names in self._sort_keys.items() if key[0] != str(tree)}
+        self._expanding = {key for key in self._expanding if key[0] != str(tree)}
+        self._rows.pop(str(tree), None)
+        self._shown.pop(str(tree), None)
+        tree.delete(*tree.get_children())
+
+    def on_tree_open(self, tree):
+        node = tree.focus()
+        placeholder = node + "/"
+        key = (str(tree), node)
+        if tree.get_children(node) != (placeholder,) or key in self._expanding:
+            return  # Already listed, or being listed
+
+        if tree is self.local_tree:
+            path = os.path.join(self.current_local_path, node)
+            list_directory = self.file_service.list_directory
+        elif self.ftp_service.is_connected:
+            path = self._remote_path(node)
+            list_directory = self.ftp_service.list_directory
+        else:
+            return
+
+        self._expanding.add(key)
+        def do_expand():
+            try:
+                _, items = list_directory(path)
+            except Exception as e:
+                self.log(f"Error al abrir '{node}': {e}")
+                self.master.after(0, lambda: self._fill_node(tree, node, None))
+                return
+            fill = _TreeFill()
+            self.master.after(0, lambda: self._fill_node(tree, node, fill))
+            try:
+                self._queue_batches(fill, items)
+            except Exception as e:
+                self.log(f"Error al abrir '{node}': {e}")
+
+        self._executor.submit(do_expand)
+
+    def _fill_node(self, tree, node, fill):
+        key = (str(tree), node)
+        if key not in self._expanding:
+            if fill is not None:
+                fill.cancelled = True
+            return  # The tree was reloaded meanwhile
+        self._expanding.discard(key)
+        if fill is None:
+            tree.item(node, open=False)  # Keep the placeholder so it can be retried
+            return
+        tree.delete(node + "/")
+        self._begin_fill(tree, fill, node)
+
+    def populate_local_tree(self, path=None, _retry=False):
         if path is None:
             path = self.current_local_path
-        
-        try:
-            abs_path, items = self.file_service.list_directory(path)
-            self.current_local_path = abs_path
-            self.local_path_label.config(text=f"Local: {self.current_local_path}")
-            
-            self.local_tree.delete(*self.local_tree.get_children())
 
-            if self.file_service.get_parent_dir(self.current_local_path) != self.current_local_path:
-                self.local_tree.insert("", "end", text="..", values=("", "Directorio Padre"), iid="..")
+        # A folder's mtime changes whenever an entry is added, removed or
+        # renamed in it, so an unchanged one needn't be listed again.
+        abs_path = os.path.abspath(path)
+        try:
+            mtime = os.stat(abs_path).st_mtime_ns
+        except OSError:
+            mtime = None  # list_directory reports the problem below
+        if abs_path == self.current_local_path and mtime is not None and mtime == self._local_mtime:
+            return
 
-            for item in items:
-                display_name = f"📁 {item['name']}" if item['is_dir'] else f"📄 {item['name']}"
-                self.local_tree.insert("", "end", text=display_name, values=(item['size'], item['type']), iid=item['name'])
+        try:
+            # A cached listing is only good for the folder as it is now.
+            cached = self._local_cache.get(path, version=mtime) if mtime is not None else None
+            if cached:
+                abs_path, items = cached
+            else:
+                abs_path, items = self.file_service.list_directory(path)
+                self._local_cache.put(path, abs_path, items, version=mtime)
+            fill = _TreeFill()
+            if self._shown.get(str(self.local_tree)) == abs_path:
+                fill.seen = set()  # Same folder again: only apply what changed
+            else:
+                self.current_local_path = abs_path
+                self.local_path_label.config(text=f"Local: {self.current_local_path}")
+
+                self._clear_tree(self.local_tree)
+                self._shown[str(self.local_tree)] = abs_path
+
+                if not self.file_service.is_root(self.current_local_path):
+                    self.local_tree.insert("", "end", text="..", values=("", "Directorio Padre"), iid="..")
+
+            self._local_mtime = mtime
+            self._queue_batches(self._begin_fill(self.local_tree, fill), items)
         except Exception as e:
             self.log(f"Error al leer directorio local: {e}")
             messagebox.showerror("Error Local", f"No se pudo acceder a la carpeta: {path}\n{e}")
-            if path != self.file_service.get_user_home():
-                self.populate_local_tree(self.file_service.get_user_home())
+            if not _retry and path != self.file_service.get_user_home():
+                self.populate_local_tree(self.file_service.get_user_home(), _retry=True)
 
     def populate_remote_tree(self, path=None):
         if not self.ftp_service.is_connected:
@@ -346,29 +1360,85 @@ class FTPClientGUI:
         if path is None:
             path = self.current_remote_path
         
-        self.remote_tree.delete(*self.remote_tree.get_children())
+        # The current rows stay on screen until the new listing arrives.
+        request = self._remote_request = object()
         
         def do_populate():
+            cached = self._remote_cache.get(path)
             try:
-                current_path, items = self.ftp_service.list_directory(path)
-                self.current_remote_path = current_path
-                
-                def update_ui():
+                current_path, items = cached or self.ftp_service.list_directory(path)
+            except Exception as e:
+                self.log(f"Error al leer directorio remoto: {e}")
+                self.master.after(0, lambda: messagebox.showerror("Error Remoto", f"No se pudo acceder a la carpeta remota: {path}\n{e}"))
+                return
+
+            fill = _TreeFill()
+            def update_ui():
+                if request is not self._remote_request or not self.ftp_service.is_connected:
+                    fill.cancelled = True
+                    return  # A newer listing was asked for, or we disconnected
+                if self._shown.get(str(self.remote_tree)) == current_path:
+                    fill.seen = set()  # Same folder again: only apply what changed
+                else:
+                    self.current_remote_path = current_path
+                    self._clear_tree(self.remote_tree)
+                    self._shown[str(self.remote_tree)] = current_path
                     self.remote_path_label.config(text=f"Remoto: {self.current_remote_path}")
                     if self.current_remote_path != "/":
                         self.remote_tree.insert("", "end", text="..", values=("", "Directorio Padre"), iid="..")
-                    
-                    for item in items:
-                        display_name = f"📁 {item['name']}" if item['is_dir'] else f"📄 {item['name']}"
-                        self.remote_tree.insert("", "end", text=display_name, values=(item['size'], item['type']), iid=item['name'])
-                
-                self.master.after(0, update_ui)
-            
+                self._begin_fill(self.remote_tree, fill)
+
+            self.master.after(0, update_ui)
+            if cached:
+                self._queue_batches(fill, items)
+                return
+
+            # Rows show up while the rest of the listing is still arriving;
+            # a copy is kept and cached once the listing is complete.
+            received = []
+            def keep(entries):
+                for item in entries:
+                    received.append(item)
+                    yield item
+            try:
+                self._queue_batches(fill, keep(items))
             except Exception as e:
                 self.log(f"Error al leer directorio remoto: {e}")
-                self.master.after(0, lambda: messagebox.showerror("Error Remoto", f"No se pudo acceder a la carpeta remota: {path}\n{e}"))
+            else:
+                if not fill.cancelled:
+                    self._remote_cache.put(path, current_path, received)
+
+        self._executor.submit(do_populate)
+
+    def refresh_local_tree(self):
+        # Files can change size without touching the folder's mtime.
+        self._local_mtime = None
+        self._local_cache.invalidate(self.current_local_path)
+        self.populate_local_tree()
 
-        threading.Thread(target=do_populate, daemon=True).start()
+    def refresh_remote_tree(self):
+        self._remote_cache.invalidate(self.current_remote_path)
+        self.populate_remote_tree()
+
+    def _show_transferred_file(self, tree, name, size):
+        """
+        Adds (or updates) the row of a file that was just transferred, in its
+        sorted position, instead of listing the whole folder again.
+        """
+        fill = self._fills.get((str(tree), ""))
+        if fill is not None:
+            # The folder is still being filled (or waits for a scroll); the
+            # listing may or may not include the file, so have it skip it.
+            fill.added = fill.added | {name}
+            if fill.seen is not None:
+                fill.seen.add(name)  # Nor may a refresh prune it
+
+        item = {'name': name, 'size': size, 'type': "Archivo", 'is_dir': False}
+        if tree.exists(name):
+            tree.item(name, values=(size, "Archivo"))
+            self._rows[str(tree)][name] = item
+        else:
+            self._insert_items(tree, [item])
 
     def change_local_drive(self, event=None):
         selected_drive = self.drive_var.get()
@@ -378,11 +1448,10 @@ class FTPClientGUI:
     def on_double_click(self, event, tree):
         item_id = tree.focus()
         if not item_id: return
-        
-        item = tree.item(item_id)
-        item_type = item["values"][1]
 
-        if "Directorio" in item_type:
+        # Rows are looked up on our side, no need to ask Tk for their values.
+        item = self._rows.get(str(tree), {}).get(item_id)
+        if item_id == ".." or (item is not None and item['is_dir']):
             if tree is self.local_tree:
                 if item_id == "..":
                     new_path = self.file_service.get_parent_dir(self.current_local_path)
@@ -393,63 +1462,156 @@ class FTPClientGUI:
                 if item_id == "..":
                     new_path = "/".join(self.current_remote_path.split('/')[:-1]) or "/"
                 else:
-                    new_path = f"{self.current_remote_path}/{item_id}" if self.current_remote_path != "/" else f"/{item_id}"
+                    new_path = self._remote_path(item_id)
                 self.populate_remote_tree(new_path)
+            return "break"  # Don't let the default binding also toggle the folder open
+
+    def _remote_path(self, name):
+        # Pooled sessions don't share a working directory, so always hand the
+        # FTP service absolute paths.
+        return f"{self.current_remote_path}/{name}" if self.current_remote_path != "/" else f"/{name}"
+
+    def _start_progress(self, size):
+        """
+        Registers a transfer of about ``size`` bytes and returns its key and
+        progress callback. The bar shows all the transfers of the current
+        batch as one, so parallel transfers don't make it jump around.
+        """
+        key = object()
+        with self._progress_lock:
+            self._progress[key] = [0, size]
+        if not self._progress_polling:
+            self._progress_polling = True
+            self._poll_progress()
+
+        def report(transferred, total):
+            # Called from the transfer thread after every block, so it only
+            # takes note; _poll_progress moves the bar from the Tk loop.
+            with self._progress_lock:
+                entry = self._progress.get(key)
+                if entry is None:
+                    return
+                entry[0] = max(entry[0], transferred)  # Range threads may report out of order
+                if total:
+                    entry[1] = total
+        return key, report
+
+    def _finish_progress(self, key):
+        with self._progress_lock:
+            entry = self._progress.get(key)
+            if entry is not None:
+                entry[0] = entry[1]  # Failed ones count as done, or the batch would never end
+            if all(done >= total for done, total in self._progress.values()):
+                self._progress.clear()  # Batch over; the next transfer starts a new one
+
+    def _poll_progress(self):
+        with self._progress_lock:
+            percent = self._progress_percent() if self._progress else 100
+            self._progress_polling = bool(self._progress)
+        self.progress_bar.config(value=percent)
+        if self._progress_polling:
+            self.master.after(self._PROGRESS_INTERVAL_MS, self._poll_progress)
+
+    def _progress_percent(self):
+        done = sum(min(done, total) for done, total in self._progress.values())
+        total = sum(total for _, total in self._progress.values())
+        return done * 100 / total if total else 0
+
+    def _from_transfer(self, callback):
+        """Has the Tk loop run ``callback``, unless the window is closing."""
+        if self._closing:
+            return
+        try:
+            self.master.after(0, callback)
+        except (RuntimeError, tk.TclError):
+            if not self._closing:
+                raise  # Otherwise it closed just now
+
+    def _row_size(self, tree, item_id):
+        try:
+            return int(self._rows[str(tree)][item_id]['size'])
+        except (KeyError, ValueError):
+            return 0  # Unknown yet; the transfer reports the real size
+
+    def _on_transfer_done(self, tree, folder, name, size):
+        if tree is self.remote_tree and not self.ftp_service.is_connected:
+            return  # The remote tree was cleared; the next connection lists it anew
+        cache = self._local_cache if tree is self.local_tree else self._remote_cache
+        cache.invalidate(folder)
+        current = self.current_local_path if tree is self.local_tree else self.current_remote_path
+        if current == folder:  # Otherwise the user moved on; the row isn't visible
+            self._show_transferred_file(tree, name, size)
+
+    def _selected_files(self, tree):
+        rows = self._rows.get(str(tree), {})
+        return [item_id for item_id in tree.selection()
+                if item_id in rows and not rows[item_id]['is_dir']]
 
     def upload_file(self):
-        selected_item_id = self.local_tree.focus()
-        if not selected_item_id or not self.ftp_service.is_connected:
+        if not self.ftp_service.is_connected:
             self.log("Seleccione un archivo local y conéctese a un servidor para subir.")
             return
 
-        item = self.local_tree.item(selected_item_id)
-        item_type = item.get("values")[1] if item.get("values") else ""
-
-        if item_type != "Archivo":
+        selected = self._selected_files(self.local_tree)
+        if not selected:
             self.log("Selección no válida. Solo se pueden subir archivos.")
             return
 
-        local_path = os.path.join(self.current_local_path, selected_item_id)
-        
-        def do_upload():
+        remote_dir = self.current_remote_path
+
+        def do_upload(selected_item_id, local_path, remote_path, name, progress_key, report):
             try:
                 self.log(f"Subiendo '{selected_item_id}'...")
-                self.ftp_service.upload_file(local_path, selected_item_id)
+                self.ftp_service.upload_file(local_path, remote_path, progress=report)
                 self.log(f"'{selected_item_id}' subido con éxito.")
-                self.master.after(0, self.populate_local_tree)
+                size = os.path.getsize(local_path)
+                self._from_transfer(lambda: self._on_transfer_done(self.remote_tree, remote_dir, name, size))
             except Exception as e:
                 self.log(f"Error al subir '{selected_item_id}': {e}")
-                self.master.after(0, lambda: messagebox.showerror("Error de Subida", str(e)))
-
-        threading.Thread(target=do_upload, daemon=True).start()
+                self._from_transfer(lambda: messagebox.showerror("Error de Subida", str(e)))
+            finally:
+                self._finish_progress(progress_key)
+
+        for selected_item_id in selected:
+            # Files from an expanded subfolder go to the remote folder on screen.
+            name = selected_item_id.rsplit("/", 1)[-1]
+            local_path = os.path.join(self.current_local_path, selected_item_id)
+            progress_key, report = self._start_progress(self._row_size(self.local_tree, selected_item_id))
+            self._transfers.submit(do_upload, selected_item_id, local_path, self._remote_path(name), name,
+                                   progress_key, report)
 
     def download_file(self):
-        selected_item_id = self.remote_tree.focus()
-        if not selected_item_id or not self.ftp_service.is_connected:
+        if not self.ftp_service.is_connected:
             self.log("Seleccione un archivo remoto y conéctese a un servidor para descargar.")
             return
 
-        item = self.remote_tree.item(selected_item_id)
-        item_type = item.get("values")[1] if item.get("values") else ""
-
-        if item_type != "Archivo":
+        selected = self._selected_files(self.remote_tree)
+        if not selected:
             self.log("Selección no válida. Solo se pueden descargar archivos.")
             return
 
-        local_path = os.path.join(self.current_local_path, selected_item_id)
+        local_dir = self.current_local_path
 
-        def do_download():
+        def do_download(selected_item_id, remote_path, local_path, name, progress_key, report):
             try:
                 self.log(f"Descargando '{selected_item_id}'...")
-                self.ftp_service.download_file(selected_item_id, local_path)
+                self.ftp_service.download_file(remote_path, local_path, progress=report)
                 self.log(f"'{selected_item_id}' descargado con éxito.")
-                self.master.after(0, self.populate_local_tree)
+                size = os.path.getsize(local_path)
+                self._from_transfer(lambda: self._on_transfer_done(self.local_tree, local_dir, name, size))
             except Exception as e:
                 self.log(f"Error al descargar '{selected_item_id}': {e}")
-                self.master.after(0, lambda: messagebox.showerror("Error de Descarga", str(e)))
-
-        threading.Thread(target=do_download, daemon=True).start()
-
+                self._from_transfer(lambda: messagebox.showerror("Error de Descarga", str(e)))
+            finally:
+                self._finish_progress(progress_key)
+
+        for selected_item_id in selected:
+            # Files from an expanded subfolder land in the local folder on screen.
+            name = selected_item_id.rsplit("/", 1)[-1]
+            local_path = os.path.join(local_dir, name)
+            progress_key, report = self._start_progress(self._row_size(self.remote_tree, selected_item_id))
+            self._transfers.submit(do_download, selected_item_id, self._remote_path(selected_item_id), local_path, name,
+                                   progress_key, report)
 
 if __name__ == "__main__":
     root = tk.Tk()